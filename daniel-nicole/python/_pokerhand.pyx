@@ -0,0 +1,103 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+'''
+C implementation of the poker hand weight used by sortable_poker_hands.
+
+Build it in place with:
+    cythonize -i _pokerhand.pyx
+
+When it is not built, sortable_poker_hands falls back to its pure Python weight.
+'''
+
+from libc.stdint cimport uint32_t
+from libc.string cimport memset
+
+
+# Rank of each card value, from the lowest (2) to the highest (A), indexed by its character,
+# -1 for any other character.
+cdef int RANK[256]
+for i in range(256):
+    RANK[i] = -1
+for i, rank in enumerate('23456789TJQKA'):
+    RANK[ord(rank)] = i
+
+
+cdef uint32_t _classify(const unsigned char *hand) nogil:
+    '''Weight a hand in the exact format of the kata, 5 cards separated by a single space.
+
+    Returns 0, which is never a valid weight, if a card rank is unknown or all 5 ranks are the same.
+    '''
+    cdef int counts[13]
+    cdef int cards[5]
+    cdef int i, n, count, rank, max_count
+    cdef bint suited = True
+    cdef bint straight, low_straight
+    cdef uint32_t weight
+
+    memset(counts, 0, sizeof(counts))
+    # each card starts every 3 characters, with its rank first and then its suit
+    for i in range(0, 15, 3):
+        rank = RANK[hand[i]]
+        if rank < 0:
+            return 0
+        counts[rank] += 1
+        if counts[rank] == 5:
+            # there are only 4 cards of each rank
+            return 0
+        if hand[i+1] != hand[1]:
+            suited = False
+
+    # the cards ranks, ordered by how many times each rank appears and then from the highest
+    n = 0
+    for count in range(4, 0, -1):
+        for rank in range(12, -1, -1):
+            if counts[rank] == count:
+                for i in range(count):
+                    cards[n] = rank
+                    n += 1
+
+    max_count = counts[cards[0]]
+    low_straight = max_count == 1 and cards[0] == 12 and cards[1] == 3
+    straight = max_count == 1 and (cards[0] - cards[4] == 4 or low_straight)
+    if low_straight:
+        # in a Low Straight the Ace counts as the lowest card
+        for i in range(4):
+            cards[i] = cards[i+1]
+        cards[4] = -1
+
+    if straight and suited:
+        weight = 1
+    elif max_count == 4:
+        weight = 2
+    elif max_count == 3 and counts[cards[3]] == 2:
+        weight = 3
+    elif suited:
+        weight = 4
+    elif straight:
+        weight = 5
+    elif max_count == 3:
+        weight = 6
+    elif max_count == 2 and counts[cards[2]] == 2:
+        weight = 7
+    elif max_count == 2:
+        weight = 8
+    else:
+        weight = 9
+
+    for i in range(5):
+        weight = (weight << 4) | <uint32_t>(13 - cards[i])
+    return weight
+
+
+def classify(bytes hand):
+    '''Return the packed weight of a hand, the same one PokerHand._compute_weight returns.
+
+    Raises:
+        ValueError: If the hand is not 5 cards of a known rank separated by a single space,
+            or if all 5 cards have the same rank, the same way PokerHand does.
+    '''
+    if len(hand) != 14 or hand[2::3] != b'    ':
+        raise ValueError('a hand must be 5 cards separated by a single space')
+    weight = _classify(hand)
+    if weight == 0:
+        raise ValueError('a hand must be 5 cards of a known rank, with at most 4 cards of each rank')
+    return weight
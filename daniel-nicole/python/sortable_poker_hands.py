@@ -28,10 +28,348 @@ An ace can either rank high or rank low in a straight or straight flush. Example
 Note: there are around 25000 random tests, so keep an eye on performances.
 '''
 
-from collections import defaultdict
+from __future__ import annotations
+
+import logging
+from functools import total_ordering
+from itertools import combinations_with_replacement
+from operator import attrgetter
 from typing import List
 
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is only needed to rank many hands at once with PokerHand.rank_many
+    np = None
+
+try:
+    # the C implementation of the hand weight, built with: cythonize -i _pokerhand.pyx
+    if __package__:
+        from ._pokerhand import classify
+    else:
+        from _pokerhand import classify
+except ImportError:
+    classify = None
+
+_logger = logging.getLogger(__name__)
+
+# Rank of each card value, from the lowest (2) to the highest (A).
+RANK = {rank: i for i, rank in enumerate('23456789TJQKA')}
+
+# Position of each card in a hand, which is always 5 cards of 2 characters separated by a single space.
+CARD_OFFSETS = (0, 3, 6, 9, 12)
+
+# Rank of the highest card of every Straight, keyed by the bitmask of its ranks.
+STRAIGHT_MASKS = {0x1F << i: i + 4 for i in range(9)}
+# in a Low Straight the Ace counts as the lowest card, so the 5 is the highest
+STRAIGHT_MASKS[0x100F] = RANK['5']
+
+
+def _classify(ranks, suits):
+    '''Weight a single hand for PokerHand.rank_many, compiled with Numba by warm_up.
+
+    Args:
+        ranks: The 5 ranks of the cards, in any order.
+        suits: The 5 suits of the cards, as any comparable numbers.
+
+    Returns:
+        The hand weight packed with the cards weights into a single integer.
+    '''
+    counts = np.zeros(13, dtype=np.int64)
+    for i in range(5):
+        counts[ranks[i]] += 1
+
+    suited = True
+    for i in range(1, 5):
+        if suits[i] != suits[0]:
+            suited = False
+
+    # the cards ranks, ordered by how many times each rank appears and then from the highest
+    cards = np.empty(5, dtype=np.int64)
+    n = 0
+    for count in range(4, 0, -1):
+        for rank in range(12, -1, -1):
+            if counts[rank] == count:
+                for _ in range(count):
+                    cards[n] = rank
+                    n += 1
+
+    max_count = counts[cards[0]]
+    low_straight = max_count == 1 and cards[0] == 12 and cards[1] == 3
+    straight = max_count == 1 and (cards[0] - cards[4] == 4 or low_straight)
+    if low_straight:
+        # in a Low Straight the Ace counts as the lowest card
+        cards[0:4] = cards[1:5]
+        cards[4] = -1
+
+    if straight and suited:
+        weight = 1
+    elif max_count == 4:
+        weight = 2
+    elif max_count == 3 and counts[cards[3]] == 2:
+        weight = 3
+    elif suited:
+        weight = 4
+    elif straight:
+        weight = 5
+    elif max_count == 3:
+        weight = 6
+    elif max_count == 2 and counts[cards[2]] == 2:
+        weight = 7
+    elif max_count == 2:
+        weight = 8
+    else:
+        weight = 9
+
+    for i in range(5):
+        weight = (weight << 4) | (13 - cards[i])
+    return weight
+
+
+def _classify_many(ranks, suits):
+    '''Weight every hand of a batch with _classify, compiled with Numba by warm_up.'''
+    weights = np.empty(ranks.shape[0], dtype=np.int64)
+    for i in range(ranks.shape[0]):
+        weights[i] = _classify(ranks[i], suits[i])
+    return weights
+
+
+def _pack(weight, *ranks):
+    '''Pack the hand weight and the weight of each card into a single integer, 4 bits per card.'''
+    for rank in ranks:
+        weight = (weight << 4) | (13 - rank)
+    return weight
+
+
+def _straight_high_card(ranks):
+    '''Return the rank of the highest card in the Straight, or None if the ranks are not a Straight.'''
+    mask = 0
+    for rank in ranks:
+        mask |= 1 << rank
+
+    return STRAIGHT_MASKS.get(mask)
+
+
+def _five_different_cards(ranks, groups, suited):
+    '''Weight a Straight Flush, a Flush, a Straight or a High Card.'''
+    straight_high_card = _straight_high_card(ranks)
+
+    # if it is a straight flush:
+    if suited and straight_high_card is not None:
+        return _pack(1, *range(straight_high_card, straight_high_card-5, -1))
+    # if it is a flush:
+    if suited:
+        return _pack(4, *ranks)
+    # if it is a straight:
+    if straight_high_card is not None:
+        return _pack(5, *range(straight_high_card, straight_high_card-5, -1))
+    # high card:
+    return _pack(9, *ranks)
+
+
+def _four_of_a_kind(ranks, groups, suited):
+    '''Weight a Four of a Kind.'''
+    four = groups[4][0]
+    kicker = groups[1][0]
+    return _pack(2, *[four]*4, kicker)
+
+
+def _full_house(ranks, groups, suited):
+    '''Weight a Full House.'''
+    triple = groups[3][0]
+    pair = groups[2][0]
+    return _pack(3, *[triple]*3, *[pair]*2)
+
+
+def _three_of_a_kind(ranks, groups, suited):
+    '''Weight a Three of a Kind.'''
+    triple = groups[3][0]
+    return _pack(6, *[triple]*3, *groups[1])
+
+
+def _two_pairs(ranks, groups, suited):
+    '''Weight a Two Pairs.'''
+    high_pair, low_pair = groups[2]
+    kicker = groups[1][0]
+    return _pack(7, *[high_pair]*2, *[low_pair]*2, kicker)
+
+
+def _pair(ranks, groups, suited):
+    '''Weight a Pair.'''
+    pair = groups[2][0]
+    return _pack(8, *[pair]*2, *groups[1])
+
+
+# Weight function of every hand, keyed by how many times each rank appears in it.
+DISPATCH = {
+    (1, 1, 1, 1, 1): _five_different_cards,
+    (4, 1): _four_of_a_kind,
+    (3, 2): _full_house,
+    (3, 1, 1): _three_of_a_kind,
+    (2, 2, 1): _two_pairs,
+    (2, 1, 1, 1): _pair,
+}
+
+
+def _weigh(ranks, suited):
+    '''Analize hand strenght.
+
+    Args:
+        ranks: The ranks of the cards, from the highest to the lowest.
+        suited: Whether all the cards have the same suit.
+
+    Returns:
+        The hand weight packed into a single integer, the same way PokerHand.rank_many does it:
+        the hand weight in the highest bits, then 4 bits for each card weight to break a tie
+        in case the hand weight is the same. The cards weights go from 1 for an Ace to 13 for a 2,
+        so the lowest number wins.
+    '''
+    # counts holds how many times each rank appears in the hand
+    counts = [0] * 13
+    for rank in ranks:
+        counts[rank] += 1
+    # pattern holds the counts of the ranks in the hand, from the most repeated one
+    pattern = tuple(sorted((count for count in counts if count), reverse=True))
+    # groups holds the ranks in the hand by how many times they appear, from the highest
+    groups = [[] for _ in range(5)]
+    for rank in range(12, -1, -1):
+        if counts[rank]:
+            groups[counts[rank]].append(rank)
+
+    return DISPATCH[pattern](ranks, groups, suited)
+
+
+def _build_weights():
+    '''Weight every possible hand once, keyed by its ranks from the highest and whether it is suited.'''
+    weights = {}
+    for ranks in combinations_with_replacement(range(12, -1, -1), 5):
+        # there are only 4 cards of each rank
+        if ranks[0] == ranks[4]:
+            continue
+        weights[(*ranks, False)] = _weigh(ranks, False)
+        # only 5 different cards can share the same suit
+        if len(set(ranks)) == 5:
+            weights[(*ranks, True)] = _weigh(ranks, True)
+    return weights
+
+
+# Weight of all the 7462 distinct poker hands, see _build_weights.
+# The C implementation does not need it, so it is only built without it.
+WEIGHTS = _build_weights() if classify is None else None
+
+
+if np is not None:
+    # Rank of each card value indexed by its character, -1 for any other character.
+    _RANK_LUT = np.full(256, -1, dtype=np.int64)
+    _RANK_LUT[np.frombuffer(''.join(RANK).encode('ascii'), dtype=np.uint8)] = list(RANK.values())
+
+
+def _parse_many(hands):
+    '''Parse a batch of hands into an array of ranks and an array of suits, one row per hand.
+
+    Raises:
+        ValueError: If a hand is not 5 cards of a known rank separated by a single space,
+            or if all its 5 cards have the same rank.
+    '''
+    # every hand takes 15 bytes with its trailing separator, and each card starts every 3 bytes
+    if any(len(hand) != 14 for hand in hands):
+        raise ValueError('every hand must be 5 cards separated by a single space')
+    buffer = (' '.join(hands) + ' ').encode('ascii')
+    raw = np.frombuffer(buffer, dtype=np.uint8).reshape(-1, 15)
+    if (raw[:, 2::3] != ord(' ')).any():
+        raise ValueError('every hand must be 5 cards separated by a single space')
+
+    ranks = _RANK_LUT[raw[:, 0:14:3]]
+    # there are only 4 cards of each rank
+    if (ranks < 0).any() or (ranks == ranks[:, :1]).all(axis=1).any():
+        raise ValueError('every hand must be 5 cards of a known rank, with at most 4 cards of each rank')
+    return ranks, raw[:, 1:14:3]
+
+
+# The Numba-compiled _classify_many, set by warm_up: None until then, False if Numba is not usable.
+_compiled_classify_many = None
+
+
+def warm_up():
+    '''Compile the Numba kernels used by PokerHand.rank_many, or load them from the on-disk cache.
+
+    The first PokerHand.rank_many call does it otherwise, so call it up front to keep the compile time,
+    a few seconds the first time and well under a second from the cache, out of the ranking itself.
+    Numba is only imported here, so importing this module does not pay for it.
+    Setting NUMBA_DISABLE_JIT=1 runs the kernels as plain Python, which is handy for debugging them.
+
+    Returns:
+        Whether PokerHand.rank_many uses the Numba kernels rather than plain NumPy operations.
+    '''
+    global _classify, _compiled_classify_many
+    if _compiled_classify_many is not None:
+        return _compiled_classify_many is not False
+    try:
+        from numba import njit
+    except ImportError:
+        _compiled_classify_many = False
+        return False
+
+    # _classify_many calls _classify through the module globals, so the compiled one replaces it there
+    _classify = njit(cache=True, fastmath=False)(_classify)
+    compiled = njit(cache=True, fastmath=False)(_classify_many)
+    try:
+        compiled(*_parse_many(['2S 3H 4D 5C 7S']))
+    except ImportError as error:
+        # the cache entry was written when this module was imported under another name
+        _logger.warning('cannot load the cached Numba kernels, falling back to NumPy: %s', error)
+        _classify = _classify.py_func
+        _compiled_classify_many = False
+        return False
 
+    _compiled_classify_many = compiled
+    return True
+
+
+def _classify_batch(ranks, suits):
+    '''Weight every hand of a batch with the Numba kernels, or with NumPy if they are not usable.'''
+    if warm_up():
+        return _compiled_classify_many(ranks, suits)
+    return _classify_vectorized(ranks, suits)
+
+
+def _classify_vectorized(ranks, suits):
+    '''Weight every hand of a batch with NumPy operations, the same way _classify does.'''
+    suited = (suits == suits[:, :1]).all(axis=1)
+    # how many times the rank of each card appears in its hand
+    counts = (ranks[:, :, None] == ranks[:, None, :]).sum(axis=2)
+    # sort the cards by count and then by rank, both from the highest to the lowest
+    keys = -np.sort(-(counts * 16 + ranks), axis=1)
+    counts = keys >> 4
+    ranks = keys & 15
+
+    distinct = counts[:, 0] == 1
+    low_straight = distinct & (ranks[:, 0] == RANK['A']) & (ranks[:, 1] == RANK['5'])
+    straight = distinct & ((ranks[:, 0] - ranks[:, 4] == 4) | low_straight)
+    # in a Low Straight the Ace counts as the lowest card
+    ranks[low_straight] = [3, 2, 1, 0, -1]
+
+    weights = np.select(
+        [
+            straight & suited,
+            counts[:, 0] == 4,
+            (counts[:, 0] == 3) & (counts[:, 3] == 2),
+            suited,
+            straight,
+            counts[:, 0] == 3,
+            (counts[:, 0] == 2) & (counts[:, 2] == 2),
+            counts[:, 0] == 2,
+        ],
+        [1, 2, 3, 4, 5, 6, 7, 8],
+        default=9,
+    )
+    for i in range(5):
+        weights = (weights << 4) | (13 - ranks[:, i])
+
+    return weights
+
+
+@total_ordering
 class PokerHand(object):
     '''Representation of a poker hand and its basic characteristics.
 
@@ -68,184 +406,113 @@ class PokerHand(object):
 
     If still there is a tie, then it is a tie because all the Suits have the same weight.
 
+    Sorting with hands.sort() compares the hands through __lt__, which is fine for a few hands.
+    When sorting a lot of them, hands.sort(key=sort_key) is faster because it compares the
+    packed weights directly, without calling back into PokerHand.
+
     Attributes:
         hand (str): String representation of the poker hand.
-        cards (List[PokerCard]): The list of poker cards in this hand.
+        ranks (List[int]): The ranks of the cards, from the highest to the lowest, parsed when accessed.
+        suits (str): The suits of the cards, packed into a single string, parsed when accessed.
+        _weight (int): The hand weight packed with the cards weights, computed once when the hand is created.
+
+    Raises:
+        ValueError: If the hand is not 5 cards of a known rank separated by a single space,
+            or if all its 5 cards have the same rank.
     '''
     def __repr__(self):
         return self.hand
 
     def __init__(self, hand: str):
         self.hand = hand
-        self.cards = [PokerCard(card) for card in hand.split(' ')]
-        self.cards.sort()
-        
+        # the C implementation checks the hand the same way _compute_weight does
+        if classify is not None:
+            self._weight = classify(hand.encode('ascii'))
+        else:
+            self._weight = self._compute_weight()
+
+    def __hash__(self):
+        return hash(self._weight)
+
     def __eq__(self, other: PokerHand):
-        self_hand_weight = self.get_hand_weight()
-        other_hand_weight = other.get_hand_weight()
+        if not isinstance(other, PokerHand):
+            return NotImplemented
+        return self._weight == other._weight
 
-        if self_hand_weight[0] != other_hand_weight[0]:
-            return False
-        
-        for i in range(1, len(self_hand_weight)):
-            if self_hand_weight[i] != other_hand_weight[i]:
-                return False
-        return True
-    
     def __lt__(self, other: PokerHand):
-        self_hand_weight = self.get_hand_weight()
-        other_hand_weight = other.get_hand_weight()
+        if not isinstance(other, PokerHand):
+            return NotImplemented
+        # the hand weight sits in the highest bits of the packed weight, above the tiebreakers,
+        # so a plain integer comparison also breaks the ties by the highest ranking cards.
+        return self._weight < other._weight
 
-        if self_hand_weight[0] < other_hand_weight[0]:
-            return True
-        
-        # if both hands have teh same weight, the tie must be broken by highest ranking cards.
-        if self_hand_weight[0] == other_hand_weight[0]:
-            for i in range(1, len(self_hand_weight)):
-                # if the rank is also equal, you want to check the next cards, if any are left
-                if self_hand_weight[i] == other_hand_weight[i]:
-                    continue
-                if self_hand_weight[i] < other_hand_weight[i]:
-                    return True
-                return False
-        # if it is a tie
-        return False
+    @classmethod
+    def rank_many(cls, hands: List[str]) -> np.ndarray:
+        '''Rank a large batch of hands at once without creating a PokerHand for each of them.
+
+        Every hand is weighted as a single integer: the hand weight in the highest bits,
+        followed by 4 bits for each card weight, ordered by how many times its rank appears
+        and then from the highest to the lowest, so the lowest number still wins.
+        The hands must follow the exact format of the kata, 5 cards separated by a single space.
+        When Numba is installed, the first call compiles its kernels unless warm_up was called before.
 
-    def get_hand_weight(self):
-        '''Analize hand strenght.
+        Args:
+            hands: The string representations of the poker hands.
 
         Returns:
-            A Tuple containing the hand weight as its firs argument,
-            then the cards ranks to break a tie in case the hand weight is the same.
+            The indices that sort the hands, the highest ranking hand first,
+            the same order that sorted([PokerHand(hand) for hand in hands]) gives.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+            ValueError: If a hand is not 5 cards of a known rank separated by a single space,
+                or if all its 5 cards have the same rank.
         '''
-        hand = defaultdict(int)
-        for card in self.cards:
-            hand[card.rank] += 1
-
-        length = len(hand)
-        # values holds the count for how many times each rank appears in the hand
-        values = list(hand.values())
-
-        # five different cards
-        if length == 5:
-            suited = self.is_suited()
-            straight_high_card = self.is_a_straight()
-
-            # if it is a straight flush:
-            if suited and straight_high_card:
-                return (1, straight_high_card)
-            # if it is a flush:
-            if suited:
-                return (4, *self.cards)
-            # if it is a straight:
-            if straight_high_card:
-                return (5, straight_high_card)
-            # high card:
-            return (9, *self.cards)
-
-        if length == 2:
-            # four of a kind:
-            if 4 in values:
-                i_four = values.index(4)
-                i_kicker = values.index(1)
-                return (2, self.cards[i_four], self.cards[i_kicker])
-
-            # full house:
-            i_triple = values.index(3)
-            i_pair = values.index(2)
-            return (3, self.cards[i_triple], self.cards[i_pair])
-
-        if length == 3:
-            # triple:
-            if 3 in values:
-                i_triple = values.index(3)
-                return (6, self.cards[i_triple], *self.cards[:i_triple], *self.cards[i_triple+1:])
-
-            # two pairs:
-            i_pair = values.index(2)
-            j_pair = values.index(2, i_pair+1)
-            i_kicker = values.index(1)
-            return (7, self.cards[i_pair], self.cards[j_pair], self.cards[i_kicker])
-
-        if length == 4:
-            # this is a pair:
-            i_pair = values.index(2)
-            return (8, self.cards[i_pair], *self.cards[:i_pair], *self.cards[i_pair+1:])
+        if np is None:
+            raise ImportError('PokerHand.rank_many requires NumPy')
+        if not hands:
+            return np.empty(0, dtype=np.intp)
+
+        ranks, suits = _parse_many(hands)
+        weights = _classify_batch(ranks, suits)
+        return np.argsort(weights, kind='stable')
+
+    @property
+    def ranks(self) -> List[int]:
+        return sorted((RANK[self.hand[i]] for i in CARD_OFFSETS), reverse=True)
+
+    @property
+    def suits(self) -> str:
+        # every suit sits right after its rank, so one slice packs the 5 suits together
+        return self.hand[1::3]
+
+    def _compute_weight(self):
+        '''Check the hand and look up its weight in the precomputed WEIGHTS table, see _weigh.'''
+        hand = self.hand
+        if len(hand) != 14 or hand[2::3] != '    ':
+            raise ValueError('a hand must be 5 cards separated by a single space')
+        try:
+            ranks = sorted((RANK[hand[i]] for i in CARD_OFFSETS), reverse=True)
+        except KeyError:
+            raise ValueError('a hand must be 5 cards of a known rank, with at most 4 cards of each rank') from None
+        # there are only 4 cards of each rank
+        if ranks[0] == ranks[4]:
+            raise ValueError('a hand must be 5 cards of a known rank, with at most 4 cards of each rank')
+
+        return WEIGHTS[(*ranks, hand[1::3] == hand[1] * 5)]
 
     def is_suited(self):
         '''Check if hand is Suited.'''
-        for i in range(len(self.cards)-1):
-            if self.cards[i].suit != self.cards[i+1].suit:
-                return False
+        return self.suits == self.suits[0] * 5
 
-        return True
-    
     def is_a_straight(self):
         '''Check if hand is a Straight
         
         Returns:
-            The highest card in the Straight.
+            The rank of the highest card in the Straight, or None if it is not a Straight.
         '''
-        starter = 0
-        # if True, skips the first element to check for the Low Straight
-        if self.cards[0].rank == 'A' and self.cards[1].rank == '5':
-            starter = 1
-
-        for i in range(starter, len(self.cards)-1):
-            if self.cards[i+1] - self.cards[i] != 1:
-                return False
+        return _straight_high_card(self.ranks)
 
-        # in case it was a Low Straight, you want to return the 5 instead of the Ace
-        if starter == 1:
-            return self.cards[1]
 
-        return self.cards[0]
-
-
-class PokerCard(object):
-    '''Representation of a poker card and its basic characteristics.
-
-    The PokerCards Weight are:
-        Ace:    1       |   7:      8
-        King:   2       |   6:      9
-        Queen:  3       |   5:      10
-        Jack:   4       |   4:      11
-        Ten:    5       |   3:      12
-        9:      6       |   2:      13
-        8:      7       |   Ace*:   When comparing it in a low Straight
-
-    Attributes:
-        card (str): String representation of the poker card.
-        rank (str): The rank of the card.
-        suit (str): The suit of the card.
-    '''
-    def __repr__(self):
-        return self.get_card_weight()
-    
-    def __init__(self, card: str):
-        self.card = card
-        self.rank = card[0]
-        self.suit = card[1]
-    
-    def __eq__(self, other: PokerCard):
-        return True if self.get_card_weight() == other.get_card_weight() else False
-    
-    def __lt__(self, other: PokerCard):
-        return True if self.get_card_weight() < other.get_card_weight() else False
-    
-    def __sub__(self, other: PokerCard):
-        return self.get_card_weight() - other.get_card_weight()
-    
-    def get_card_weight(self):
-        '''Return the card weight based on its rank.'''
-        if self.rank == 'T':
-            return 5
-        if self.rank == 'J':
-            return 4
-        if self.rank == 'Q':
-            return 3
-        if self.rank == 'K':
-            return 2
-        if self.rank == 'A':
-            return 1
-        return (63 - ord(self.rank))
+# Sort key giving the same order as the PokerHand comparisons, see PokerHand.
+sort_key = attrgetter('_weight')
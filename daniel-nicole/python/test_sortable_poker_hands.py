@@ -0,0 +1,214 @@
+import random
+import unittest
+from collections import Counter
+
+if __package__:
+    from . import sortable_poker_hands as poker
+else:
+    import sortable_poker_hands as poker
+
+PokerHand = poker.PokerHand
+
+# The sample test of the kata, from the highest ranking hand to the lowest.
+SAMPLE = [
+    'KS AS TS QS JS',
+    '2H 3H 4H 5H 6H',
+    'AS AD AC AH JD',
+    'JS JD JC JH 3D',
+    '2S AH 2H AS AC',
+    'AS 3S 4S 8S 2S',
+    '2H 3H 5H 6H 7H',
+    '2S 3H 4H 5S 6C',
+    '2D AC 3H 4H 5S',
+    'AH AC 5H 6H AS',
+    '2S 2H 4H 5S 4C',
+    'AH AC 5H 6H 7S',
+    'AH AC 4H 6H 7S',
+    '2S AH 4H 5S KC',
+    '2S 3H 6H 7S 9C',
+]
+
+DECK = [rank + suit for rank in '23456789TJQKA' for suit in 'SHDC']
+
+# Weight of all the distinct poker hands, built by the pure Python code.
+WEIGHTS = poker._build_weights()
+
+
+def table_weight(hand):
+    '''Return the weight of a hand string from WEIGHTS, without going through PokerHand.'''
+    ranks = sorted(('23456789TJQKA'.index(hand[i]) for i in range(0, 14, 3)), reverse=True)
+    return WEIGHTS[(*ranks, len(set(hand[1::3])) == 1)]
+
+
+def reference_key(hand):
+    '''Rank a hand string the straightforward way, the higher the key the better the hand.'''
+    ranks = ['23456789TJQKA'.index(hand[i]) for i in range(0, 14, 3)]
+    counts = Counter(ranks)
+    # the ranks ordered by how many times they appear, and then from the highest
+    ordered = sorted(counts, key=lambda rank: (counts[rank], rank), reverse=True)
+    pattern = sorted(counts.values(), reverse=True)
+    flush = len(set(hand[1::3])) == 1
+
+    straight = None
+    if len(counts) == 5 and max(ranks) - min(ranks) == 4:
+        straight = max(ranks)
+    if sorted(ranks) == [0, 1, 2, 3, 12]:
+        straight = 3
+
+    if straight is not None:
+        return (8 if flush else 4, straight)
+    if pattern == [4, 1]:
+        return (7, *ordered)
+    if pattern == [3, 2]:
+        return (6, *ordered)
+    if flush:
+        return (5, *ordered)
+    if pattern == [3, 1, 1]:
+        return (3, *ordered)
+    if pattern == [2, 2, 1]:
+        return (2, *ordered)
+    if pattern == [2, 1, 1, 1]:
+        return (1, *ordered)
+    return (0, *ordered)
+
+
+def representative_hands():
+    '''Return one hand string for every entry of WEIGHTS, along with its weight.'''
+    hands = []
+    for (*ranks, suited), weight in WEIGHTS.items():
+        # cards of the same rank get different suits
+        suits = ['SHDC'[ranks[:i].count(rank)] for i, rank in enumerate(ranks)]
+        if not suited and len(set(ranks)) == 5:
+            suits[4] = 'H'
+        hand = ' '.join('23456789TJQKA'[rank] + suit for rank, suit in zip(ranks, suits))
+        hands.append((hand, weight))
+    return hands
+
+
+def random_hands(count):
+    '''Return random hand strings, always the same ones.'''
+    generator = random.Random(20201007)
+    return [' '.join(generator.sample(DECK, 5)) for _ in range(count)]
+
+
+class PokerHandTest(unittest.TestCase):
+
+    def assert_sorted(self, expected):
+        hands = [PokerHand(hand) for hand in reversed(expected)]
+        random.Random(len(expected)).shuffle(hands)
+        self.assertEqual([hand.hand for hand in sorted(hands)], expected)
+        self.assertEqual([hand.hand for hand in sorted(hands, key=poker.sort_key)], expected)
+
+    def test_sample(self):
+        self.assert_sorted(SAMPLE)
+
+    def test_full_house_tie(self):
+        self.assert_sorted(['4S 4D 4C JH JD', '3D 3S 3H AD AC', '3D 3S 3H KD KC'])
+
+    def test_two_pairs_tie(self):
+        self.assert_sorted(['KS KH 2D 2C 3S', 'QS QH JD JC AS', 'QS QH TD TC AS', 'QS QH TD TC KS'])
+
+    def test_low_straight(self):
+        self.assert_sorted(['6C 5D 4C 3S 2S', '5C 4D 3C 2S AS', 'AS AD AC KS QD'])
+
+    def test_low_straight_flush(self):
+        self.assert_sorted(['6S 5S 4S 3S 2S', '5S 4S 3S 2S AS', 'AS AD AC AH KD'])
+
+    def test_equal_hands(self):
+        self.assertEqual(PokerHand('KS 2H 5C JD TD'), PokerHand('KD 2S 5H JC TC'))
+        self.assertEqual(hash(PokerHand('KS 2H 5C JD TD')), hash(PokerHand('KD 2S 5H JC TC')))
+        self.assertEqual(len({PokerHand('KS 2H 5C JD TD'), PokerHand('KD 2S 5H JC TC')}), 1)
+
+    def test_total_ordering(self):
+        flush, pair = PokerHand('AS 3S 4S 8S 2S'), PokerHand('2S 2H 4H 5S 4C')
+        self.assertTrue(flush <= pair and flush <= flush and pair > flush and pair >= flush)
+        self.assertFalse(flush > pair or flush >= pair or pair <= flush)
+
+    def test_compare_with_other_types(self):
+        hand = PokerHand('KS 2H 5C JD TD')
+        self.assertNotEqual(hand, 'KS 2H 5C JD TD')
+        self.assertNotIn('KS 2H 5C JD TD', {hand})
+        with self.assertRaises(TypeError):
+            hand < 'KS 2H 5C JD TD'
+
+    def test_reference_order(self):
+        hands = [hand for hand, _ in representative_hands()] + random_hands(5000)
+        hands.sort(key=reference_key, reverse=True)
+        for better, worse in zip(hands, hands[1:]):
+            if reference_key(better) == reference_key(worse):
+                self.assertEqual(PokerHand(better), PokerHand(worse), (better, worse))
+            else:
+                self.assertLess(PokerHand(better), PokerHand(worse), (better, worse))
+
+    def test_weights_table(self):
+        self.assertEqual(len(WEIGHTS), 7462)
+        self.assertEqual(len(set(WEIGHTS.values())), 7462)
+
+    def test_invalid_hands(self):
+        for hand in ['KS 2H 5C JD TD ', 'KS 2H 5C JD', 'XS 2H 5C JD TD', 'ks 2h 5c jd td', 'KS 2H 5CxJD TD',
+                     'AS AH AD AC AS']:
+            with self.subTest(hand=hand):
+                with self.assertRaises(ValueError):
+                    PokerHand(hand)
+
+
+class ClassifierEquivalenceTest(unittest.TestCase):
+    '''Every way of weighting a hand must give the same weight as the WEIGHTS table.'''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.hands = representative_hands()
+        cls.hands += [(hand, table_weight(hand)) for hand in random_hands(5000)]
+
+    @unittest.skipIf(poker.classify is None, 'the Cython extension is not built')
+    def test_cython(self):
+        for hand, weight in self.hands:
+            self.assertEqual(poker.classify(hand.encode('ascii')), weight, hand)
+
+    @unittest.skipIf(poker.classify is None, 'the Cython extension is not built')
+    def test_cython_invalid_hands(self):
+        for hand in [b'KS 2H 5C JD TD ', b'XS 2H 5C JD TD', b'ks 2h 5c jd td', b'AS AH AD AC AS']:
+            with self.subTest(hand=hand):
+                with self.assertRaises(ValueError):
+                    poker.classify(hand)
+
+    @unittest.skipIf(poker.np is None, 'NumPy is not installed')
+    def test_vectorized(self):
+        ranks, suits = poker._parse_many([hand for hand, _ in self.hands])
+        weights = poker._classify_vectorized(ranks, suits).tolist()
+        self.assertEqual(weights, [weight for _, weight in self.hands])
+
+    @unittest.skipIf(poker.np is None, 'NumPy is not installed')
+    def test_numba(self):
+        # compile or typing errors in the kernels are raised by warm_up and fail the test
+        if not poker.warm_up():
+            self.skipTest('Numba is not installed, or its cached kernels cannot be loaded')
+        ranks, suits = poker._parse_many([hand for hand, _ in self.hands])
+        weights = poker._compiled_classify_many(ranks, suits).tolist()
+        self.assertEqual(weights, [weight for _, weight in self.hands])
+
+    @unittest.skipIf(poker.np is None, 'NumPy is not installed')
+    def test_rank_many(self):
+        hands = [hand for hand, _ in self.hands]
+        order = PokerHand.rank_many(hands)
+        self.assertEqual(sorted(PokerHand(hand) for hand in hands), [PokerHand(hands[i]) for i in order])
+        self.assertEqual(PokerHand.rank_many([]).tolist(), [])
+
+    @unittest.skipIf(poker.np is None, 'NumPy is not installed')
+    def test_rank_many_invalid_hands(self):
+        for hands in [
+            ['KS 2H 5C JD TD '],
+            ['KS 2H 5C JD'],
+            ['XS 2H 5C JD TD'],
+            ['KS 2H 5CxJD TD'],
+            ['AS AH AD AC AS'],
+            # a hand too long next to a hand too short still adds up to the right total length
+            ['KS 2H 5C JD TD 3S', '2S 3H 6H 7S'],
+        ]:
+            with self.subTest(hands=hands):
+                with self.assertRaises(ValueError):
+                    PokerHand.rank_many(['2S 3H 6H 7S 9C'] + hands)
+
+
+if __name__ == '__main__':
+    unittest.main()